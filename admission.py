@@ -0,0 +1,260 @@
+"""
+Admission control, per-request deadlines and load shedding for the agent entrypoint.
+
+Every invocation has to be admitted before it runs. At most AGENT_MAX_CONCURRENCY
+invocations run at the same time, up to AGENT_MAX_QUEUE more wait (for at most
+AGENT_QUEUE_TIMEOUT seconds) for a free slot, and everything beyond that is rejected
+immediately instead of piling up until the container runs out of memory.
+
+Admitted requests get a deadline of AGENT_REQUEST_TIMEOUT seconds from arrival. The
+deadline is stored in a context variable so the tools can turn the remaining time into
+MongoDB `maxTimeMS` values and Bedrock read timeouts.
+
+Shed, timed-out and completed requests are counted in `metrics()`.
+"""
+
+import asyncio
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from aws_clients import MAX_CONCURRENCY, READ_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+MAX_QUEUE = int(os.getenv('AGENT_MAX_QUEUE', '20'))
+QUEUE_TIMEOUT = float(os.getenv('AGENT_QUEUE_TIMEOUT', '5'))
+REQUEST_TIMEOUT = float(os.getenv('AGENT_REQUEST_TIMEOUT', '60'))
+
+# Bedrock clients are cached per read timeout, so timeouts are rounded down to this step
+READ_TIMEOUT_STEP = 5
+# A retry after a read timeout would run past the deadline, so deadline-scoped clients do not retry
+DEADLINE_MAX_ATTEMPTS = 1
+
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed because the agent is at capacity."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs past its deadline."""
+
+
+def remaining_time():
+    """
+    Seconds left until the current request's deadline, or None outside of a request.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return remaining
+
+
+def max_time_ms():
+    """
+    The remaining time as a MongoDB `maxTimeMS` value, or None outside of a request.
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return None
+    return max(1, int(remaining * 1000))
+
+
+def aggregate_options() -> dict:
+    """
+    Keyword arguments limiting `Collection.aggregate` to the remaining time.
+
+    Empty outside of a request: unlike `find_one(max_time_ms=None)`, `aggregate` would send
+    `maxTimeMS: null`, which the server rejects.
+    """
+    ms = max_time_ms()
+    return {} if ms is None else {'maxTimeMS': ms}
+
+
+def bedrock_read_timeout():
+    """
+    The remaining time as a Bedrock read timeout, or None outside of a request.
+
+    The value never exceeds the remaining time: it is rounded down to READ_TIMEOUT_STEP
+    seconds (whole seconds, at least one, below the first step) and capped at the default
+    read timeout, which keeps the number of cached clients small.
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return None
+    if remaining < READ_TIMEOUT_STEP:
+        return max(1, math.floor(remaining))
+    return min(READ_TIMEOUT, READ_TIMEOUT_STEP * math.floor(remaining / READ_TIMEOUT_STEP))
+
+
+class AdmissionController:
+    """
+    Bounded in-flight limit with a bounded wait queue in front of it.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_CONCURRENCY, max_queue: int = MAX_QUEUE,
+                 queue_timeout: float = QUEUE_TIMEOUT, request_timeout: float = REQUEST_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._counters = {
+            'admitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'shed_queue_full': 0,
+            'shed_queue_timeout': 0,
+            'timed_out': 0,
+        }
+
+    def _count(self, name: str):
+        with self._cond:
+            self._counters[name] += 1
+
+    def metrics(self) -> dict:
+        """Snapshot of the admission counters and current in-flight/queued gauges."""
+        with self._cond:
+            return dict(self._counters, in_flight=self._in_flight, queued=self._waiting)
+
+    def _shed(self, reason: str):
+        self._counters[reason] += 1
+        logger.warning(f"Shedding request ({reason}): {dict(self._counters, in_flight=self._in_flight, queued=self._waiting)}")
+        raise Overloaded(reason)
+
+    def _acquire(self) -> float:
+        """
+        Take an in-flight slot, waiting in the queue if all slots are busy.
+
+        Returns:
+            float: The request's deadline on the `time.monotonic()` clock
+
+        Raises:
+            Overloaded: If the queue is full or no slot frees up in time
+        """
+        deadline = time.monotonic() + self.request_timeout
+        with self._cond:
+            if self._in_flight >= self.max_in_flight:
+                if self._waiting >= self.max_queue:
+                    self._shed('shed_queue_full')
+                self._waiting += 1
+                try:
+                    admitted = self._cond.wait_for(
+                        lambda: self._in_flight < self.max_in_flight,
+                        timeout=min(self.queue_timeout, self.request_timeout),
+                    )
+                finally:
+                    self._waiting -= 1
+                if not admitted:
+                    self._shed('shed_queue_timeout')
+            self._in_flight += 1
+            self._counters['admitted'] += 1
+        return deadline
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def _release_when_done(self, executor: ThreadPoolExecutor):
+        executor.shutdown(wait=True)
+        self._release()
+
+    @contextmanager
+    def admit(self):
+        """
+        Admit one request, waiting in the queue if all slots are busy.
+
+        Yields:
+            float: The request's deadline on the `time.monotonic()` clock
+
+        Raises:
+            Overloaded: If the queue is full or no slot frees up in time
+        """
+        token = _deadline.set(self._acquire())
+        try:
+            yield _deadline.get()
+        finally:
+            _deadline.reset(token)
+            self._release()
+
+    def run(self, coroutine_fn, *args):
+        """
+        Admit a request and run `coroutine_fn(*args)` on a fresh event loop within its deadline.
+
+        The coroutine is started after the deadline is set, so it (and any tool running in a
+        thread via `asyncio.to_thread`) sees the deadline in its context.
+
+        Threads cannot be interrupted, so on timeout the call returns without waiting for the
+        ones still running (unlike `asyncio.run`, which joins them). The request keeps its
+        in-flight slot until they have finished.
+
+        Raises:
+            Overloaded: If the request was shed
+            DeadlineExceeded: If the request did not finish before its deadline
+        """
+        token = _deadline.set(self._acquire())
+        executor = ThreadPoolExecutor(thread_name_prefix='agent-request')
+        timed_out = False
+        try:
+            timeout = remaining_time()
+            result = _run_in_loop(asyncio.wait_for(coroutine_fn(*args), timeout=timeout), executor)
+        except (asyncio.TimeoutError, DeadlineExceeded):
+            timed_out = True
+            self._count('timed_out')
+            logger.warning(f"Request timed out after {self.request_timeout}s: {self.metrics()}")
+            raise DeadlineExceeded(f"Request did not finish within {self.request_timeout}s")
+        except Exception:
+            self._count('failed')
+            raise
+        finally:
+            _deadline.reset(token)
+            if timed_out:
+                executor.shutdown(wait=False, cancel_futures=True)
+                threading.Thread(target=self._release_when_done, args=(executor,),
+                                 name='admission-release', daemon=True).start()
+            else:
+                self._release_when_done(executor)
+        self._count('completed')
+        return result
+
+
+def _cancel_all_tasks(loop):
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+
+def _run_in_loop(coroutine, executor: ThreadPoolExecutor):
+    """
+    Like `asyncio.run`, but with `executor` as the default executor and without waiting for
+    its threads on shutdown.
+    """
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(executor)
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coroutine)
+    finally:
+        try:
+            _cancel_all_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
@@ -1,18 +1,31 @@
 import time
+# Taken before the other imports, so the startup log shows the full import time
+_import_start = time.perf_counter()
+
+import os
+import re
+import asyncio
 import logging
-import boto3
 
 from pymongo import MongoClient
 from langchain_aws.embeddings import BedrockEmbeddings
-from botocore.exceptions import ClientError
 from strands import Agent, tool
 from strands.models import BedrockModel
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
 
+import best_time
+import catalog
+from admission import (DEADLINE_MAX_ATTEMPTS, AdmissionController, DeadlineExceeded, Overloaded,
+                       aggregate_options, bedrock_read_timeout, max_time_ms)
+from aws_clients import client_config, get_client, get_secret
+from context_builder import build_context, estimate_tokens
+from intent_router import Intent, IntentRouter
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = BedrockAgentCoreApp()
+admission = AdmissionController()
 
 @tool
 def current_time() -> int:
@@ -38,30 +51,37 @@ def place_lookup_by_country(query_str: str) -> str:
     """
     logger.info(f"Looking up places by country: {query_str}")
     try:
-        client = get_mongo_client()
-        # get database and collection
-        collection = get_travel_collection(client)
-        res = ""
-        res = collection.aggregate(
-            [
-                {"$match": {"Country": {"$regex": query_str, "$options": "i"}}},
-                {"$project": {"Place Name": 1}},
-            ]
-        )
-        places = []
-        for place in res:
-            places.append(place["Place Name"])
+        places = find_places_by_country(query_str)
         logger.info(f"Found {len(places)} places in country: {query_str}")
         return str(places)
     except Exception as e:
         logger.error(f"Error looking up places by country '{query_str}': {e}")
         raise
 
-def get_travel_collection(client):
-    logger.info("Getting travel collection from MongoDB")
-    db = client['travel']
-    collection = db['asia']
-    return collection
+def name_match(query_str, exact=False):
+    """Case-insensitive `$regex` condition for `query_str`, or for exactly that name if `exact`"""
+    return {"$regex": f"^{re.escape(query_str)}$" if exact else query_str, "$options": "i"}
+
+def find_places_by_country(query_str, exact=False):
+    """Return the names of the places whose country matches the `query_str` regex
+
+    With `exact`, `query_str` is a plain country name and has to match the whole name.
+    """
+    client = get_mongo_client()
+
+    def lookup(collection):
+        res = collection.aggregate(
+            [
+                {"$match": {"Country": name_match(query_str, exact)}},
+                {"$project": {"Place Name": 1}},
+            ],
+            **aggregate_options(),
+        )
+        return [place["Place Name"] for place in res]
+
+    # Only the country's region is searched when it is known, otherwise all regions
+    results = catalog.fan_out(client, lookup, catalog.collections_for(query_str))
+    return [name for _, places in results for name in places]
 
 @tool
 def place_lookup_by_name(query_str: str) -> str:
@@ -75,18 +95,7 @@ def place_lookup_by_name(query_str: str) -> str:
     """
     logger.info(f"Looking up place by name: {query_str}")
     try:
-        client = get_mongo_client()
-        collection = get_travel_collection(client)
-        res = ""
-        filter = {
-            "$or": [
-                {"Place Name": {"$regex": query_str, "$options": "i"}},
-                {"Country": {"$regex": query_str, "$options": "i"}},
-            ]
-        }
-        project = {"_id": 0}
-
-        res = collection.find_one(filter=filter, projection=project)
+        res = find_place(query_str, {"_id": 0})
         logger.info(f"Found place details for: {query_str}")
         return str(res)
     except Exception as e:
@@ -105,31 +114,96 @@ def place_best_time_lookup(query_str: str) -> str:
     """
     logger.info(f"Looking up best time to visit for place: {query_str}")
     try:
-        client = get_mongo_client()
-        collection = get_travel_collection(client)
-        res = ""
+        res = find_place(query_str, {"Best Time To Visit": 1, "_id": 0})
+        logger.info(f"Found best time to visit for: {query_str}")
+        return str(res)
+    except Exception as e:
+        logger.error(f"Error looking up best time to visit for '{query_str}': {e}")
+        raise
+
+def find_place(query_str, project, exact=False):
+    """Return the first place whose name or country matches the `query_str` regex
+
+    With `exact`, `query_str` is a plain place name and only a place of exactly that name matches.
+    """
+    client = get_mongo_client()
+    if exact:
+        filter = {"Place Name": name_match(query_str, exact=True)}
+    else:
         filter = {
             "$or": [
-                {"Place Name": {"$regex": query_str, "$options": "i"}},
-                {"Country": {"$regex": query_str, "$options": "i"}},
+                {"Place Name": name_match(query_str)},
+                {"Country": name_match(query_str)},
             ]
         }
-        project = {"Best Time To Visit": 1, "_id": 0}
 
-        res = collection.find_one(filter=filter, projection=project)
-        logger.info(f"Found best time to visit for: {query_str}")
-        return str(res)
+    def lookup(collection):
+        return collection.find_one(filter=filter, projection=project, max_time_ms=max_time_ms())
+
+    results = catalog.fan_out(client, lookup, catalog.collections_for(query_str))
+    # Prefer the first collection in catalog order that has a match
+    return next((res for _, res in results if res is not None), None)
+
+@tool
+def places_to_visit_now(country: str = "") -> str:
+    """Retrieve places whose best time to visit includes the current month
+
+    Args:
+        country: Optional country name to restrict the places to
+
+    Returns:
+        Places that are in season this month, most season-specific first
+    """
+    month = time.strftime("%B")
+    logger.info(f"Looking up places to visit in {month} (country: {country or 'any'})")
+    try:
+        places = find_places_in_season(month, country)
+        logger.info(f"Found {len(places)} places to visit in {month}")
+        return str(places)
     except Exception as e:
-        logger.error(f"Error looking up best time to visit for '{query_str}': {e}")
+        logger.error(f"Error looking up places to visit in {month}: {e}")
         raise
 
+def find_places_in_season(month, country="", limit=10):
+    """Return places whose parsed best-time months include `month`, most season-specific first
+
+    Places with a short season that includes `month` rank first, as this month is one of
+    their few good ones; year-round destinations come last.
+    """
+    client = get_mongo_client()
+    match = {best_time.MONTHS_FIELD: month}
+    if country:
+        match["Country"] = {"$regex": country, "$options": "i"}
+    pipeline = [
+        {"$match": match},
+        {"$addFields": {"season_months": {"$size": f"${best_time.MONTHS_FIELD}"}}},
+        {"$sort": {"season_months": 1, "Place Name": 1}},
+        {"$limit": limit},
+        {"$project": {"Place Name": 1, "Country": 1, "Best Time To Visit": 1, "season_months": 1, "_id": 0}},
+    ]
+
+    def lookup(collection):
+        return list(collection.aggregate(pipeline, **aggregate_options()))
+
+    results = catalog.fan_out(client, lookup, catalog.collections_for(country))
+    docs = sorted(
+        (doc for _, docs in results for doc in docs),
+        key=lambda doc: (doc["season_months"], doc.get("Place Name", "")),
+    )[:limit]
+    for doc in docs:
+        del doc["season_months"]
+    return docs
+
 # Setup bedrock
 def setup_bedrock():
     """Initialize the Bedrock runtime."""
     logger.info("Setting up Bedrock runtime client")
-    return boto3.client(
-        service_name="bedrock-runtime",
-        region_name="us-east-1",
+    read_timeout = bedrock_read_timeout()
+    return get_client(
+        "bedrock-runtime",
+        "us-east-1",
+        read_timeout=read_timeout,
+        max_attempts=None if read_timeout is None else DEADLINE_MAX_ATTEMPTS,
     )
 
 
@@ -152,7 +226,6 @@ def mongodb_search(query: str) -> str:
         )
         
         client = get_mongo_client()
-        collection = get_travel_collection(client)
         
         field_name_to_be_vectorized = "About Place"
 
@@ -162,74 +235,54 @@ def mongodb_search(query: str) -> str:
 
         # get the vector search results based on the filter conditions.
         logger.info("Performing vector search in MongoDB")
-        response = collection.aggregate(
-            [
-                {
-                    "$vectorSearch": {
-                        "index": "travel_vector_index",
-                        "path": "details_embedding",
-                        "queryVector": embedding_value,
-                        "numCandidates": 200,
-                        "limit": 10,
-                    }
-                },
-                {
-                    "$project": {
-                        "score": {"$meta": "vectorSearchScore"},
-                        field_name_to_be_vectorized: 1,
-                        "_id": 0,
-                    }
-                },
-            ]
-        )
+        pipeline = [
+            {
+                "$vectorSearch": {
+                    "index": "travel_vector_index",
+                    "path": "details_embedding",
+                    "queryVector": embedding_value,
+                    "numCandidates": 200,
+                    "limit": 10,
+                }
+            },
+            {
+                "$project": {
+                    "score": {"$meta": "vectorSearchScore"},
+                    field_name_to_be_vectorized: 1,
+                    "Place Name": 1,
+                    "Country": 1,
+                    "details_embedding": 1,
+                    "_id": 0,
+                }
+            },
+        ]
+
+        def search(collection):
+            return list(collection.aggregate(pipeline, **aggregate_options()))
 
-        # Result is a list of docs with the array fields
-        docs = list(response)
+        # Search the regions mentioned in the query, or all of them in parallel
+        results = catalog.fan_out(client, search, catalog.collections_mentioned(query))
+
+        # Result is a list of docs with the array fields, best scores across regions first
+        docs = catalog.merge_by_score(results, limit=10)
         logger.info(f"Found {len(docs)} results from vector search")
 
-        # Extract an array field from the docs
-        array_field = [doc[field_name_to_be_vectorized] for doc in docs]
-
-        # Join array elements into a string
-        llm_input_text = "\n \n".join(str(elem) for elem in array_field)
-
-        # utility
-        newline, bold, unbold = "\n", "\033[1m", "\033[0m"
-        logger.info(
-            newline
-            + bold
-            + "Given Input From MongoDB Vector Search: "
-            + unbold
-            + newline
-            + llm_input_text
-            + newline
+        # Deduplicate, diversify and trim the hits to the context token budget
+        llm_input_text = build_context(
+            query,
+            embedding_value,
+            docs,
+            text_field=field_name_to_be_vectorized,
+            vector_field="details_embedding",
         )
+        logger.info(f"Built search context of ~{estimate_tokens(llm_input_text)} tokens from {len(docs)} results")
+        logger.debug(f"Given input from MongoDB vector search:\n{llm_input_text}")
 
         return llm_input_text
     except Exception as e:
         logger.error(f"Error performing semantic search for query '{query}': {e}")
         raise
 
-def get_secret(secret_name):
-    """
-    Retrieve secret from AWS Secrets Manager
-    """
-    client = boto3.client(
-        service_name='secretsmanager'
-    )
-
-    try:
-        get_secret_value_response = client.get_secret_value(
-            SecretId=secret_name
-        )
-    except ClientError as e:
-        logger.error(f"Error retrieving secret {secret_name}: {e}")
-        raise e
-    else:
-        if 'SecretString' in get_secret_value_response:
-            logger.info(f"Successfully retrieved secret {secret_name}")
-            return get_secret_value_response['SecretString']
-
 def get_mongo_client():
     try:
         mongodb_uri = get_secret("workshop/atlas_secret")  # Replace with your secret name
@@ -243,16 +296,85 @@ def get_mongo_client():
 
 
 # Initialize Bedrock client and agent with local tools
-bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
+# BedrockModel builds its own client, so it gets the shared tuning through its config
 model = BedrockModel(
-    client=bedrock_client,
-    model_id="anthropic.claude-3-5-sonnet-20240620-v1:0"
-)
-agent = Agent(
-    model=model,
-    tools=[current_time, current_month, place_lookup_by_country, place_lookup_by_name, place_best_time_lookup, mongodb_search],
-    system_prompt="You are a travel advisor.  You can tell the current time in seconds, or get current month, look up countries by name, look up places to visit and recommend the best time to visit."
+    model_id="anthropic.claude-3-5-sonnet-20240620-v1:0",
+    region_name="us-east-1",
+    boto_client_config=client_config(),
 )
+def create_agent():
+    """Create a fresh agent for one request.
+
+    An Agent keeps the conversation in its `messages`, so sharing one between concurrent
+    requests would interleave their turns, and a request cancelled at its deadline could
+    leave a `toolUse` without its `toolResult` behind for the next one. The model and the
+    tools are stateless and shared.
+    """
+    return Agent(
+        model=model,
+        tools=[current_time, current_month, place_lookup_by_country, place_lookup_by_name, place_best_time_lookup, places_to_visit_now, mongodb_search],
+        system_prompt="You are a travel advisor.  You can tell the current time in seconds, or get current month, look up countries by name, look up places to visit, recommend the best time to visit and suggest places that are in season this month."
+    )
+
+# Optional fast path answering simple questions without the LLM tool loop
+def answer_current_month():
+    return f"It is currently {time.strftime('%B')}."
+
+def answer_places_by_country(country):
+    # Whole names only: a substring would answer "uk" with places in Ukraine
+    places = find_places_by_country(country, exact=True)
+    if not places:
+        return None
+    return f"Here are places you can visit in {country.title()}: {', '.join(places)}."
+
+def answer_best_time(place):
+    res = find_place(place, {"Place Name": 1, "Country": 1, "Best Time To Visit": 1, "_id": 0}, exact=True)
+    if not res or not res.get("Best Time To Visit"):
+        return None
+    name = f"{res['Place Name']}, {res['Country']}" if res.get("Country") else res["Place Name"]
+    return f"The best time to visit {name} is {res['Best Time To Visit']}."
+
+router = IntentRouter([
+    Intent(
+        name="current_month",
+        patterns=[
+            r"(?:what|which) month (?:is it|are we in)(?: now| today| currently)?",
+            r"what(?:'s| is) the (?:current )?month(?: now| today)?",
+        ],
+        handler=answer_current_month,
+    ),
+    Intent(
+        name="place_lookup_by_country",
+        patterns=[
+            r"(?:what|which) places (?:can|should|could) i (?:visit|see|go to) in (?P<country>[a-z][a-z .'-]{1,40})",
+            r"(?:what are (?:some )?|list |show me )?(?:the )?places to (?:visit|see) in (?P<country>[a-z][a-z .'-]{1,40})",
+        ],
+        handler=answer_places_by_country,
+    ),
+    Intent(
+        name="place_best_time_lookup",
+        patterns=[
+            r"(?:what(?:'s| is) the )?best time (?:of (?:the )?year )?to (?:visit|go to|travel to) (?P<place>[a-z][a-z .'-]{1,40})",
+            r"when (?:should i|is the best time to|to) (?:visit|go to|travel to) (?P<place>[a-z][a-z .'-]{1,40})",
+        ],
+        handler=answer_best_time,
+    ),
+]) if os.getenv('INTENT_ROUTER_ENABLED', 'false').lower() == 'true' else None
+
+async def answer(prompt):
+    """Answer through the intent router when possible, otherwise through the full agent"""
+    if router is not None:
+        # Run in a thread so the blocking lookups keep the request deadline in context
+        routed = await asyncio.to_thread(router.route, prompt)
+        if routed is not None:
+            logger.info(f"Intent router metrics: {router.metrics()}")
+            return routed
+    start = time.perf_counter()
+    response = await create_agent().invoke_async(prompt)
+    if router is not None:
+        router.record_agent_latency(time.perf_counter() - start)
+        logger.info(f"Intent router metrics: {router.metrics()}")
+    return response
 
 @app.entrypoint
 def run_agent(user_input) -> str:
@@ -266,7 +388,14 @@ def run_agent(user_input) -> str:
         prompt = str(user_input)
     
     logger.info(f"Processing user input: {prompt}")
-    response = agent(prompt)
+    try:
+        response = admission.run(answer, prompt)
+    except Overloaded:
+        return "I'm currently handling too many requests. Please try again in a moment."
+    except DeadlineExceeded:
+        return "I'm sorry, your request took too long to process. Please try again."
+    if isinstance(response, str):
+        return response
     
     # Handle different response types
     try:
@@ -315,5 +444,7 @@ def run_agent(user_input) -> str:
             return "I apologize, but I'm experiencing a technical issue with the response format. Please try again."
         return result
 
+logger.info(f"Imported agent in {time.perf_counter() - _import_start:.2f}s")
+
 if __name__ == "__main__":  
     app.run()
\ No newline at end of file
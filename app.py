@@ -1,8 +1,9 @@
-import boto3
 import json
 
+from aws_clients import get_client
+
 # Initialize the Bedrock AgentCore client
-client = boto3.client('bedrock-agentcore', region_name='us-east-1')
+client = get_client('bedrock-agentcore', 'us-east-1')
 
 input_text = "What places can I visit in India?"
 
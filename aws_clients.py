@@ -0,0 +1,115 @@
+"""
+Shared factory for boto3 clients.
+
+Creating a boto3 client is expensive (endpoint resolution, credential lookup and a fresh
+connection pool), so clients are created once per service, region, timeout and retry profile and
+reused afterwards. Every client gets the same tuned botocore configuration:
+- `max_pool_connections` sized to the agent's concurrency, so parallel tool calls do not
+  queue on the connection pool or discard warm connections
+- TCP keepalive, so idle pooled connections survive between invocations
+- adaptive retry mode, which rate-limits the client itself on throttling instead of
+  retrying into a throttling storm
+- explicit connect and read timeouts
+
+The defaults can be tuned with environment variables:
+- AGENT_MAX_CONCURRENCY (default 10)
+- AWS_CONNECT_TIMEOUT (seconds, default 5)
+- AWS_READ_TIMEOUT (seconds, default 60)
+- AWS_MAX_ATTEMPTS (default 5)
+"""
+
+import logging
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = int(os.getenv('AGENT_MAX_CONCURRENCY', '10'))
+CONNECT_TIMEOUT = float(os.getenv('AWS_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.getenv('AWS_READ_TIMEOUT', '60'))
+MAX_ATTEMPTS = int(os.getenv('AWS_MAX_ATTEMPTS', '5'))
+
+# Each invocation can have a few tool calls in flight at the same time
+POOL_CONNECTIONS_PER_INVOCATION = 2
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def client_config(read_timeout: float = None, max_attempts: int = None) -> Config:
+    """
+    Build the botocore configuration shared by all clients.
+
+    Args:
+        read_timeout (float, optional): Read timeout in seconds. Defaults to AWS_READ_TIMEOUT
+        max_attempts (int, optional): Attempts including the first call, 1 disables retries.
+            Defaults to AWS_MAX_ATTEMPTS
+
+    Returns:
+        Config: botocore client configuration
+    """
+    return Config(
+        max_pool_connections=max(10, MAX_CONCURRENCY * POOL_CONNECTIONS_PER_INVOCATION),
+        tcp_keepalive=True,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT if read_timeout is None else read_timeout,
+        retries={
+            'mode': 'adaptive',
+            'max_attempts': MAX_ATTEMPTS if max_attempts is None else max_attempts,
+        },
+    )
+
+
+def get_client(service_name: str, region_name: str = None, read_timeout: float = None,
+               max_attempts: int = None):
+    """
+    Return a cached boto3 client for the service and region.
+
+    boto3 clients are thread-safe, so the same instance is shared by all threads.
+
+    Args:
+        service_name (str): AWS service name, e.g. 'bedrock-runtime'
+        region_name (str, optional): AWS region. Defaults to the region boto3 resolves
+        read_timeout (float, optional): Read timeout in seconds. Defaults to AWS_READ_TIMEOUT
+        max_attempts (int, optional): Attempts including the first call. Defaults to AWS_MAX_ATTEMPTS
+
+    Returns:
+        botocore.client.BaseClient: The shared client
+    """
+    key = (service_name, region_name, read_timeout, max_attempts)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                # Session creation is not thread-safe, so clients are built under the lock
+                client = boto3.session.Session().client(
+                    service_name=service_name,
+                    region_name=region_name,
+                    config=client_config(read_timeout, max_attempts),
+                )
+                _clients[key] = client
+    return client
+
+
+def get_secret(secret_name):
+    """
+    Retrieve secret from AWS Secrets Manager
+    """
+    client = get_client('secretsmanager')
+
+    try:
+        get_secret_value_response = client.get_secret_value(
+            SecretId=secret_name
+        )
+    except ClientError as e:
+        logger.error(f"Error retrieving secret {secret_name}: {e}")
+        raise e
+    else:
+        if 'SecretString' in get_secret_value_response:
+            logger.info(f"Successfully retrieved secret {secret_name}")
+            return get_secret_value_response['SecretString']
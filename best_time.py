@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+"""
+Structured best-time-to-visit months for travel documents.
+
+"Best Time To Visit" is stored as free text such as "October to March",
+"April-June and September-November" or "Year-round". This module parses it into a
+`best_time_months` array of month names ("January" ... "December", as returned by
+`time.strftime("%B")`) and maintains an index on it, so "where is good to travel this
+month" becomes a single indexed query.
+
+mdb_import.py fills the field on import. Run this script to backfill existing documents:
+
+Usage:
+python best_time.py [--all]
+"""
+
+import argparse
+import logging
+import re
+
+from pymongo import ASCENDING, MongoClient, UpdateOne
+
+import catalog
+from aws_clients import get_secret
+
+logger = logging.getLogger('best_time')
+
+SOURCE_FIELD = "Best Time To Visit"
+MONTHS_FIELD = "best_time_months"
+MONTH_INDEX_NAME = "best_time_months_country"
+
+MONTHS = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+]
+
+# Northern hemisphere seasons, only used when the text names no months
+SEASONS = {
+    'winter': [12, 1, 2],
+    'spring': [3, 4, 5],
+    'summer': [6, 7, 8],
+    'autumn': [9, 10, 11],
+    'fall': [9, 10, 11],
+}
+
+_MONTH = re.compile(
+    r"\b(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+    r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?",
+    re.IGNORECASE,
+)
+# Qualifiers such as "early", "mid-" or "the end of" in front of a month
+_QUALIFIER = r"(?:(?:the\s+)?(?:early|mid|middle of|late|end of|beginning of|start of)\s*-?\s*)?"
+_RANGE_SEPARATOR = re.compile(r"\s*(?:-|to|through|thru|until|till)\s*" + _QUALIFIER, re.IGNORECASE)
+# "and" only joins a range after "between", e.g. "between late October and March"
+_BETWEEN = re.compile(r"\bbetween\s+" + _QUALIFIER + r"$", re.IGNORECASE)
+_BETWEEN_SEPARATOR = re.compile(r"\s*and\s*" + _QUALIFIER, re.IGNORECASE)
+_YEAR_ROUND = re.compile(r"year[- ]round|all (?:the )?year|any ?time|throughout the year", re.IGNORECASE)
+_EXCLUSION = re.compile(r"\b(?:avoid|except|excluding|but not)\b", re.IGNORECASE)
+_SEASON = re.compile(r"\b(" + "|".join(SEASONS) + r")\b", re.IGNORECASE)
+
+
+def _month_number(token: str) -> int:
+    return [m.lower()[:3] for m in MONTHS].index(token.lower()[:3]) + 1
+
+
+def _is_range(text: str, first, second) -> bool:
+    gap = text[first.end():second.start()]
+    if _RANGE_SEPARATOR.fullmatch(gap):
+        return True
+    return bool(_BETWEEN_SEPARATOR.fullmatch(gap) and _BETWEEN.search(text[:first.start()]))
+
+
+def parse_best_time_months(text) -> list:
+    """
+    Parse free text into the list of suitable month names, in calendar order.
+
+    Handles single months, ranges (including ones wrapping around the new year, e.g.
+    "November to February", "between October and March" or "mid-October to early March"),
+    "year-round" and, if no month is named, seasons. Anything after "avoid"/"except" is
+    ignored.
+
+    Args:
+        text (str): The "Best Time To Visit" text
+
+    Returns:
+        list: Month names, e.g. ['January', 'February', 'November', 'December']
+    """
+    if not text:
+        return []
+    text = str(text).replace('–', '-').replace('—', '-')
+    text = _EXCLUSION.split(text, maxsplit=1)[0]
+    if _YEAR_ROUND.search(text):
+        return list(MONTHS)
+
+    # "may" is only a month when capitalised, otherwise it is usually the verb
+    matches = [m for m in _MONTH.finditer(text) if m.group(1).lower() != 'may' or m.group(1)[0] == 'M']
+    numbers = set()
+    for i, match in enumerate(matches):
+        start = _month_number(match.group(1))
+        numbers.add(start)
+        if i + 1 < len(matches) and _is_range(text, match, matches[i + 1]):
+            end = _month_number(matches[i + 1].group(1))
+            length = (end - start) % 12
+            numbers.update((start - 1 + step) % 12 + 1 for step in range(length + 1))
+
+    if not numbers:
+        for season in _SEASON.findall(text):
+            numbers.update(SEASONS[season.lower()])
+
+    return [MONTHS[n - 1] for n in sorted(numbers)]
+
+
+def ensure_month_index(collection):
+    """Create the index used by month queries (optionally filtered by country)."""
+    collection.create_index(
+        [(MONTHS_FIELD, ASCENDING), ("Country", ASCENDING)],
+        name=MONTH_INDEX_NAME,
+    )
+
+
+def backfill(collection, reparse_all: bool = False, batch_size: int = 500) -> int:
+    """
+    Parse "Best Time To Visit" into `best_time_months` for the documents of `collection`.
+
+    Args:
+        collection (Collection): The travel collection to update
+        reparse_all (bool, optional): Re-parse documents that already have months. Defaults to False
+        batch_size (int, optional): Documents per bulk update. Defaults to 500
+
+    Returns:
+        int: Number of updated documents
+    """
+    query = {SOURCE_FIELD: {"$exists": True}}
+    if not reparse_all:
+        query[MONTHS_FIELD] = {"$exists": False}
+
+    updated = 0
+    updates = []
+    for doc in collection.find(query, projection={SOURCE_FIELD: 1}):
+        months = parse_best_time_months(doc.get(SOURCE_FIELD))
+        updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": {MONTHS_FIELD: months}}))
+        if len(updates) >= batch_size:
+            updated += collection.bulk_write(updates, ordered=False).modified_count
+            updates = []
+    if updates:
+        updated += collection.bulk_write(updates, ordered=False).modified_count
+
+    ensure_month_index(collection)
+    return updated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Backfill structured best-time-to-visit months')
+    parser.add_argument('--all', action='store_true', help='Re-parse documents that already have months')
+    args = parser.parse_args()
+
+    mongodb_uri = get_secret("workshop/atlas_secret")  # Replace with your secret name
+    client = MongoClient(mongodb_uri)
+
+    for collection_name in catalog.COLLECTIONS:
+        updated = backfill(client[catalog.DATABASE][collection_name], reparse_all=args.all)
+        logger.info(f"Backfilled {updated} documents in collection {collection_name}")
@@ -0,0 +1,233 @@
+"""
+Catalog router mapping countries and regions to travel collections.
+
+Places are stored in one collection per region (e.g. `travel.asia`, `travel.europe`,
+`travel.americas`), so lookups and vector searches only scan the region they need. When a
+query names a known country or region it is routed to that collection; otherwise the
+query is fanned out to all collections in parallel and the results are merged.
+
+Only the collections listed in TRAVEL_COLLECTIONS (comma separated) are used. It defaults
+to "asia", the collection the original import wrote every place to, so nothing changes
+until the data has been split with migrate_catalog.py and every enabled collection has a
+`travel_vector_index`. Places whose country maps to no enabled collection are stored in
+TRAVEL_FALLBACK_COLLECTION (default: "asia" if enabled, else the first enabled collection),
+which has to be one of the enabled collections.
+Per-collection latency is logged and available from `metrics()`.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aws_clients import MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+DATABASE = 'travel'
+DEFAULT_COLLECTION = 'asia'
+
+REGION_COUNTRIES = {
+    'asia': [
+        'Afghanistan', 'Bangladesh', 'Bhutan', 'Brunei', 'Cambodia', 'China', 'Hong Kong', 'India',
+        'Indonesia', 'Iran', 'Iraq', 'Israel', 'Japan', 'Jordan', 'Kazakhstan', 'Kyrgyzstan', 'Laos',
+        'Lebanon', 'Macau', 'Malaysia', 'Maldives', 'Mongolia', 'Myanmar', 'Nepal', 'North Korea',
+        'Oman', 'Pakistan', 'Philippines', 'Qatar', 'Saudi Arabia', 'Singapore', 'South Korea',
+        'Sri Lanka', 'Syria', 'Taiwan', 'Tajikistan', 'Thailand', 'Timor-Leste', 'Turkmenistan',
+        'United Arab Emirates', 'UAE', 'Uzbekistan', 'Vietnam', 'Yemen',
+    ],
+    'europe': [
+        'Albania', 'Andorra', 'Armenia', 'Austria', 'Azerbaijan', 'Belarus', 'Belgium',
+        'Bosnia and Herzegovina', 'Bulgaria', 'Croatia', 'Cyprus', 'Czech Republic', 'Czechia',
+        'Denmark', 'England', 'Estonia', 'Finland', 'France', 'Georgia', 'Germany', 'Greece',
+        'Hungary', 'Iceland', 'Ireland', 'Italy', 'Kosovo', 'Latvia', 'Liechtenstein', 'Lithuania',
+        'Luxembourg', 'Malta', 'Moldova', 'Monaco', 'Montenegro', 'Netherlands', 'North Macedonia',
+        'Norway', 'Poland', 'Portugal', 'Romania', 'Russia', 'San Marino', 'Scotland', 'Serbia',
+        'Slovakia', 'Slovenia', 'Spain', 'Sweden', 'Switzerland', 'Turkey', 'Ukraine',
+        'United Kingdom', 'UK', 'Vatican City', 'Wales',
+    ],
+    'americas': [
+        'Argentina', 'Bahamas', 'Barbados', 'Belize', 'Bolivia', 'Brazil', 'Canada', 'Chile',
+        'Colombia', 'Costa Rica', 'Cuba', 'Dominican Republic', 'Ecuador', 'El Salvador',
+        'Guatemala', 'Guyana', 'Haiti', 'Honduras', 'Jamaica', 'Mexico', 'Nicaragua', 'Panama',
+        'Paraguay', 'Peru', 'Puerto Rico', 'Suriname', 'Trinidad and Tobago', 'United States',
+        'USA', 'Uruguay', 'Venezuela',
+    ],
+    'africa': [
+        'Algeria', 'Botswana', 'Cape Verde', 'Egypt', 'Ethiopia', 'Ghana', 'Kenya', 'Madagascar',
+        'Mauritius', 'Morocco', 'Mozambique', 'Namibia', 'Nigeria', 'Rwanda', 'Senegal',
+        'Seychelles', 'South Africa', 'Tanzania', 'Tunisia', 'Uganda', 'Zambia', 'Zimbabwe',
+    ],
+    'oceania': [
+        'Australia', 'Cook Islands', 'Fiji', 'French Polynesia', 'New Zealand', 'Papua New Guinea',
+        'Samoa', 'Solomon Islands', 'Tonga', 'Vanuatu',
+    ],
+}
+
+REGION_ALIASES = {
+    'asia': ['asia', 'asian', 'middle east', 'southeast asia', 'south asia', 'east asia'],
+    'europe': ['europe', 'european'],
+    'americas': ['americas', 'america', 'north america', 'south america', 'central america', 'caribbean'],
+    'africa': ['africa', 'african', 'north africa', 'east africa', 'southern africa'],
+    'oceania': ['oceania', 'pacific islands', 'south pacific'],
+}
+
+
+def load_collections(environ=os.environ):
+    """
+    Read the enabled collections and the fallback collection from the environment.
+
+    Returns:
+        Tuple[list, str]: The enabled collections and the fallback collection
+
+    Raises:
+        ValueError: If no collection is enabled or the fallback is not one of them
+    """
+    collections = [
+        name.strip() for name in environ.get('TRAVEL_COLLECTIONS', DEFAULT_COLLECTION).split(',') if name.strip()
+    ]
+    if not collections:
+        raise ValueError("TRAVEL_COLLECTIONS must name at least one collection")
+    fallback = environ.get('TRAVEL_FALLBACK_COLLECTION', '').strip() or (
+        DEFAULT_COLLECTION if DEFAULT_COLLECTION in collections else collections[0]
+    )
+    if fallback not in collections:
+        raise ValueError(
+            f"TRAVEL_FALLBACK_COLLECTION '{fallback}' is not one of TRAVEL_COLLECTIONS ({', '.join(collections)})"
+        )
+    return collections, fallback
+
+
+COLLECTIONS, FALLBACK_COLLECTION = load_collections()
+
+_COUNTRY_TO_COLLECTION = {
+    country.lower(): region for region, countries in REGION_COUNTRIES.items() for country in countries
+}
+for _region, _aliases in REGION_ALIASES.items():
+    _COUNTRY_TO_COLLECTION.update({alias: _region for alias in _aliases})
+
+# Longest names first, so "south america" wins over "america"
+_MENTION = re.compile(
+    r"\b(" + "|".join(re.escape(name) for name in sorted(_COUNTRY_TO_COLLECTION, key=len, reverse=True)) + r")\b"
+)
+
+_executor = ThreadPoolExecutor(max_workers=max(4, MAX_CONCURRENCY * len(COLLECTIONS)),
+                               thread_name_prefix='catalog')
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def collection_for(country: str, collections=None):
+    """
+    Return the collection holding places of `country` (or of a region name), or None if
+    the country is unknown or its collection is not enabled.
+    """
+    if not country:
+        return None
+    name = _COUNTRY_TO_COLLECTION.get(country.strip().lower())
+    return name if name in (collections or COLLECTIONS) else None
+
+
+def home_collection(country: str, collections=None, fallback: str = None):
+    """
+    Return the collection a place of `country` is stored in: its region's collection if
+    enabled, otherwise the fallback collection.
+    """
+    return collection_for(country, collections) or fallback or FALLBACK_COLLECTION
+
+
+def collections_for(query: str):
+    """
+    Return the collections a lookup for `query` has to search: the matching region's
+    collection if `query` names a known country or region, otherwise all collections.
+    """
+    name = collection_for(query)
+    return [name] if name else list(COLLECTIONS)
+
+
+def collections_mentioned(text: str):
+    """
+    Return the collections of all countries and regions mentioned in free text, or all
+    collections if none is mentioned.
+    """
+    mentioned = {collection_for(match) for match in _MENTION.findall(text.lower())}
+    mentioned.discard(None)
+    return [name for name in COLLECTIONS if name in mentioned] or list(COLLECTIONS)
+
+
+def _record(name: str, elapsed: float, failed: bool):
+    with _metrics_lock:
+        stats = _metrics.setdefault(name, {'calls': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        stats['calls'] += 1
+        stats['errors'] += int(failed)
+        stats['total_seconds'] += elapsed
+        stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+
+
+def metrics() -> dict:
+    """Per-collection call counts, errors and average/max latency."""
+    with _metrics_lock:
+        return {
+            name: dict(stats, avg_seconds=stats['total_seconds'] / stats['calls'])
+            for name, stats in _metrics.items()
+        }
+
+
+def _timed(name: str, fn, collection):
+    start = time.perf_counter()
+    failed = False
+    try:
+        return fn(collection)
+    except Exception:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _record(name, elapsed, failed)
+        logger.info(f"Queried collection {name} in {elapsed * 1000:.0f} ms")
+
+
+def fan_out(client, fn, collection_names=None):
+    """
+    Run `fn(collection)` on every collection in parallel.
+
+    Each call runs in a copy of the caller's context, so the request deadline reaches it.
+    A collection that fails is logged and skipped, unless all of them fail.
+
+    Args:
+        client (MongoClient): The MongoDB client
+        fn (callable): Function taking a collection and returning its result
+        collection_names (list, optional): Collections to query. Defaults to all collections
+
+    Returns:
+        list: `(collection name, result)` tuples in catalog order
+    """
+    names = collection_names or COLLECTIONS
+    db = client[DATABASE]
+    if len(names) == 1:
+        return [(names[0], _timed(names[0], fn, db[names[0]]))]
+
+    futures = [
+        (name, _executor.submit(contextvars.copy_context().run, _timed, name, fn, db[name]))
+        for name in names
+    ]
+    results = []
+    errors = []
+    for name, future in futures:
+        try:
+            results.append((name, future.result()))
+        except Exception as e:
+            logger.error(f"Error querying collection {name}: {e}")
+            errors.append(e)
+    if errors and not results:
+        raise errors[0]
+    return results
+
+
+def merge_by_score(results, limit: int, score_field: str = 'score'):
+    """Merge per-collection lists of scored documents into one list, best first."""
+    docs = [doc for _, collection_docs in results for doc in collection_docs]
+    return sorted(docs, key=lambda doc: doc.get(score_field, 0.0), reverse=True)[:limit]
@@ -0,0 +1,169 @@
+"""
+Post-retrieval stage for `mongodb_search`.
+
+Turns the raw vector search hits into a compact context for the model:
+- drops duplicate hits (same place name, or near-identical embeddings)
+- re-ranks the rest for diversity with Maximal Marginal Relevance (MMR) over the
+  retrieved `details_embedding` vectors
+- keeps only the sentences of "About Place" most relevant to the query
+- cuts the output to a token budget, shortening snippets to no less than one sentence
+  and labelling every hit with its place name and score
+
+The defaults can be tuned with environment variables:
+- SEARCH_MAX_RESULTS (default 5)
+- SEARCH_TOKEN_BUDGET (approximate tokens, default 600)
+- SEARCH_MMR_LAMBDA (relevance vs. diversity trade-off, default 0.7)
+- SEARCH_SENTENCES_PER_HIT (default 3)
+"""
+
+import math
+import os
+import re
+
+MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '5'))
+TOKEN_BUDGET = int(os.getenv('SEARCH_TOKEN_BUDGET', '600'))
+MMR_LAMBDA = float(os.getenv('SEARCH_MMR_LAMBDA', '0.7'))
+SENTENCES_PER_HIT = int(os.getenv('SEARCH_SENTENCES_PER_HIT', '3'))
+
+# Hits whose embeddings are at least this similar are treated as duplicates
+DUPLICATE_SIMILARITY = 0.98
+
+# Rough English average, good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'i', 'in',
+    'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'place', 'places', 'some', 'that', 'the',
+    'to', 'was', 'we', 'where', 'which', 'with', 'want', 'like', 'visit', 'can', 'good', 'best',
+}
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def cosine_similarity(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _terms(text: str) -> set:
+    return {word for word in _WORD.findall(text.lower()) if word not in STOPWORDS and len(word) > 2}
+
+
+def deduplicate(hits, vector_field: str, name_field: str):
+    """
+    Drop hits that repeat an earlier (higher scored) hit's place name or embedding.
+    """
+    kept = []
+    seen_names = set()
+    for hit in hits:
+        name = str(hit.get(name_field, '')).strip().lower()
+        if name and name in seen_names:
+            continue
+        vector = hit.get(vector_field)
+        if vector and any(
+            kept_hit.get(vector_field) and cosine_similarity(vector, kept_hit[vector_field]) >= DUPLICATE_SIMILARITY
+            for kept_hit in kept
+        ):
+            continue
+        seen_names.add(name)
+        kept.append(hit)
+    return kept
+
+
+def mmr_rerank(query_vector, hits, vector_field: str, k: int = MAX_RESULTS, mmr_lambda: float = MMR_LAMBDA):
+    """
+    Select up to `k` hits with Maximal Marginal Relevance.
+
+    Each step picks the hit maximising
+    `lambda * sim(query, hit) - (1 - lambda) * max(sim(hit, already selected))`.
+    Hits without a vector keep their original order after the vector-ranked ones.
+    """
+    candidates = [hit for hit in hits if hit.get(vector_field)]
+    without_vector = [hit for hit in hits if not hit.get(vector_field)]
+    relevance = [cosine_similarity(query_vector, hit[vector_field]) for hit in candidates]
+
+    selected = []
+    remaining = list(range(len(candidates)))
+    while remaining and len(selected) < k:
+        def mmr_score(i):
+            redundancy = max(
+                (cosine_similarity(candidates[i][vector_field], candidates[j][vector_field]) for j in selected),
+                default=0.0,
+            )
+            return mmr_lambda * relevance[i] - (1 - mmr_lambda) * redundancy
+
+        best = max(remaining, key=mmr_score)
+        selected.append(best)
+        remaining.remove(best)
+
+    return [candidates[i] for i in selected] + without_vector[:k - len(selected)]
+
+
+def extract_snippet(query: str, text: str, max_sentences: int = SENTENCES_PER_HIT) -> str:
+    """
+    Keep the `max_sentences` sentences sharing the most terms with the query, in their
+    original order. The first sentence wins ties, as it usually introduces the place.
+    """
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(str(text)) if s.strip()]
+    if len(sentences) <= max_sentences:
+        return ' '.join(sentences)
+
+    query_terms = _terms(query)
+
+    def score(index):
+        overlap = len(query_terms & _terms(sentences[index]))
+        return (overlap, index == 0, -index)
+
+    keep = sorted(sorted(range(len(sentences)), key=score, reverse=True)[:max_sentences])
+    return ' '.join(sentences[i] for i in keep)
+
+
+def build_context(query: str, query_vector, hits, text_field: str, vector_field: str,
+                  name_field: str = 'Place Name', token_budget: int = TOKEN_BUDGET,
+                  max_results: int = MAX_RESULTS) -> str:
+    """
+    Build the model context from vector search hits.
+
+    Args:
+        query (str): The user's search query
+        query_vector (list): Embedding of the query
+        hits (list): Vector search results, best first, with a `score` field
+        text_field (str): Field holding the place description
+        vector_field (str): Field holding the place embedding
+        name_field (str, optional): Field holding the place name. Defaults to 'Place Name'
+        token_budget (int, optional): Approximate token budget of the output
+        max_results (int, optional): Maximum number of hits in the output
+
+    Returns:
+        str: One entry per selected hit, formatted as "<name> (score <score>): <snippet>"
+    """
+    selected = mmr_rerank(query_vector, deduplicate(hits, vector_field, name_field), vector_field, k=max_results)
+
+    entries = []
+    used_tokens = 0
+    for hit in selected:
+        label = hit.get(name_field) or 'Unknown place'
+        if hit.get('Country'):
+            label = f"{label}, {hit['Country']}"
+
+        # Drop the least relevant sentences until the entry fits, but keep at least one
+        remaining_tokens = token_budget - used_tokens
+        for max_sentences in range(max(1, SENTENCES_PER_HIT), 0, -1):
+            snippet = extract_snippet(query, hit.get(text_field, ''), max_sentences)
+            entry = f"{label} (score {hit.get('score', 0.0):.3f}): {snippet}"
+            fits = estimate_tokens(entry) <= remaining_tokens
+            if fits:
+                break
+        # Always return the best hit, even if its best sentence alone exceeds the budget
+        if not fits and entries:
+            break
+        entries.append(entry)
+        used_tokens += estimate_tokens(entry)
+
+    return '\n'.join(entries)
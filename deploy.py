@@ -7,8 +7,11 @@ This script provides functionality to deploy and configure an Amazon Bedrock Age
 with specified agent name and entry point. It handles the deployment process including:
 - Configuring the runtime with required parameters
 - Creating execution roles and ECR repositories automatically 
+- Packaging only the runtime dependency profile (requirements-runtime.txt) by default
+- Precompiling Python bytecode in the built image to shorten cold starts
 - Launching the runtime
 - Monitoring deployment status
+- Reporting the image size and, for local builds, the import time of the entry point in the image
 
 The code is built on the Amazon Bedrock Agent Core Starter Toolkit and requires valid AWS credentials.
 
@@ -17,26 +20,42 @@ Dependencies:
 - boto3
 
 Usage:
-uv run deploy_to_agentcore.py --agent_name <name> --entry_point <file>
+uv run deploy_to_agentcore.py --agent_name <name> --entry_point <file> [--profile runtime|full]
 
 This code has been adapted from:
 https://github.com/awslabs/amazon-bedrock-agentcore-samples/blob/main/01-tutorials/01-AgentCore-runtime/01-hosting-agent/01-strands-with-bedrock-model/runtime_with_strands_and_bedrock_models.ipynb
 """
 
 import argparse
+import glob
 import os
+import subprocess
 import time
 import json
 
 from bedrock_agentcore_starter_toolkit import Runtime
 from boto3.session import Session
-import boto3
+
+from aws_clients import get_client
 
 boto_session = Session()
 region = os.getenv('AWS_REGION', 'us-west-2')
 
 agentcore_runtime = Runtime()
 
+# Dependency profiles packaged into the image: the runtime image only needs what agent.py
+# imports. Each profile must be a standalone file, the toolkit copies only that one file.
+REQUIREMENTS_PROFILES = {
+    'runtime': 'requirements-runtime.txt',
+    'full': 'requirements.txt',
+}
+
+PRECOMPILE_MARKER = '# Precompile bytecode so cold starts skip compilation'
+# The toolkit image installs dependencies with UV_COMPILE_BYTECODE=1, so only the
+# application itself still needs compiling
+PRECOMPILE_STEP = PRECOMPILE_MARKER + '\nRUN python -m compileall -q -j 0 .\n'
+
+
 def wait_for_status():
     """
     Wait for the AgentCore runtime deployment to reach a terminal status.
@@ -68,7 +87,7 @@ def add_secrets_manager_policy(role_name: str):
     Args:
         role_name (str): Name of the IAM role to modify
     """
-    iam = boto3.client('iam', region_name=region)
+    iam = get_client('iam', region)
     
     secrets_policy = {
         "Version": "2012-10-17",
@@ -94,15 +113,156 @@ def add_secrets_manager_policy(role_name: str):
         print(f"Failed to add Secrets Manager policy: {e}")
 
 
-def deploy_agentcore(agent_name: str, entry_point: str, requirements_file: str = 'requirements.txt', local_build: bool = False):
+def find_dockerfile(agent_name: str, entry_point: str):
+    """
+    Locate the Dockerfile generated by `Runtime.configure`.
+
+    Depending on the starter toolkit version it is written next to the entry point or
+    under `.bedrock_agentcore/<agent_name>/`.
+
+    Args:
+        agent_name (str): Name of the configured agent
+        entry_point (str): Path to the entry point file for the agent
+
+    Returns:
+        str: Path to the Dockerfile, or None if it could not be found
+    """
+    project_dir = os.path.dirname(os.path.abspath(entry_point))
+    candidates = [
+        os.path.join(project_dir, '.bedrock_agentcore', agent_name or '', 'Dockerfile'),
+        os.path.join(project_dir, 'Dockerfile'),
+    ] + glob.glob(os.path.join(project_dir, '.bedrock_agentcore', '*', 'Dockerfile'))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def add_bytecode_precompilation(dockerfile_path: str):
+    """
+    Add a `compileall` step to the generated Dockerfile.
+
+    The step compiles the application at build time (site-packages are already compiled by
+    `uv pip install`), so containers do not compile its modules on each cold start. It is
+    inserted after the last `COPY`, before the final `CMD`/`ENTRYPOINT`. The starter
+    toolkit switches to a non-root `USER` before copying the application as root, and that
+    user cannot write the `__pycache__` directories, so the step runs as root and then
+    switches back.
+
+    Args:
+        dockerfile_path (str): Path to the Dockerfile to modify
+    """
+    with open(dockerfile_path) as f:
+        lines = f.readlines()
+    if any(line.strip() == PRECOMPILE_MARKER for line in lines):
+        return
+
+    def instruction(line):
+        return line.strip().split(' ', 1)[0].upper()
+
+    last_copy = max((i for i, line in enumerate(lines) if instruction(line) == 'COPY'), default=-1)
+    insert_at = len(lines)
+    for i in range(last_copy + 1, len(lines)):
+        if instruction(lines[i]) in ('CMD', 'ENTRYPOINT'):
+            insert_at = i
+            break
+
+    # The user active at the insertion point, restored after compiling as root
+    active_user = None
+    for line in lines[:insert_at]:
+        if instruction(line) == 'USER':
+            active_user = line.strip().split(None, 1)[1]
+
+    step = PRECOMPILE_STEP
+    if active_user and active_user not in ('root', '0'):
+        step = f"USER root\n{PRECOMPILE_STEP}USER {active_user}\n"
+
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    lines.insert(insert_at, step + '\n')
+
+    with open(dockerfile_path, 'w') as f:
+        f.writelines(lines)
+    print(f"Added bytecode precompilation to {dockerfile_path}")
+
+
+def report_image_size(launch_result):
+    """
+    Print the compressed size of the pushed agent image in ECR.
+
+    Args:
+        launch_result: Launch result returned by `Runtime.launch`
+
+    Returns:
+        int: Image size in bytes, or None if it could not be determined
+    """
+    ecr_uri = getattr(launch_result, 'ecr_uri', None)
+    if not ecr_uri:
+        print("Image size: unavailable (no ECR repository in launch result)")
+        return None
+    repository_name = ecr_uri.split('/', 1)[-1].split(':')[0]
+    try:
+        ecr = get_client('ecr', region)
+        images = ecr.describe_images(
+            repositoryName=repository_name,
+            imageIds=[{'imageTag': 'latest'}]
+        )['imageDetails']
+        size = images[0]['imageSizeInBytes']
+    except Exception as e:
+        print(f"Image size: unavailable ({e})")
+        return None
+    print(f"Image size: {size / (1024 * 1024):.1f} MiB (compressed, {repository_name}:latest)")
+    return size
+
+
+def report_import_time(launch_result, entry_point: str):
+    """
+    Print how long importing the entry point module takes inside the built image.
+
+    Only a local build (`--local_build`) leaves the image on this machine, so the import is
+    run in a throwaway container of it with `python -X importtime`. For CodeBuild images
+    the agent logs the same measurement ("Imported agent in ...") when the runtime starts.
+
+    Args:
+        launch_result: Launch result returned by `Runtime.launch`
+        entry_point (str): Path to the entry point file for the agent
+
+    Returns:
+        float: Import time in seconds, or None if it could not be measured
+    """
+    module = os.path.splitext(os.path.basename(entry_point))[0]
+    tag = getattr(launch_result, 'tag', None)
+    if getattr(launch_result, 'mode', None) == 'codebuild' or not tag:
+        print(f"Import time: not measured for remote builds, see 'Imported {module} in' in the runtime logs")
+        return None
+    try:
+        result = subprocess.run(
+            ['docker', 'run', '--rm', '--entrypoint', 'python', tag, '-X', 'importtime', '-c', f'import {module}'],
+            capture_output=True, text=True
+        )
+    except OSError as e:
+        print(f"Import time: unavailable ({e})")
+        return None
+    # The last line of the -X importtime report is the entry point with its cumulative time
+    lines = [line for line in result.stderr.splitlines() if line.startswith('import time:')]
+    if result.returncode != 0 or not lines or lines[-1].split('|')[-1].strip() != module:
+        print(f"Import time: unavailable ({result.stderr.strip().splitlines()[-1:]})")
+        return None
+    seconds = int(lines[-1].split('|')[1]) / 1_000_000
+    print(f"Import time of {module} in {tag}: {seconds:.2f}s")
+    return seconds
+
+
+def deploy_agentcore(agent_name: str, entry_point: str, requirements_file: str = REQUIREMENTS_PROFILES['runtime'], local_build: bool = False, precompile: bool = True):
     """
     Deploy an Amazon Bedrock Agent Core runtime with the specified configuration.
 
     Args:
         agent_name (str): Name of the agent to deploy
         entry_point (str): Path to the entry point file for the agent
-        requirements_file (str, optional): Path to requirements.txt file. Defaults to 'requirements.txt'
+        requirements_file (str, optional): Path to requirements file. Defaults to 'requirements-runtime.txt'
         local_build (bool, optional): Whether to build the container locally. Defaults to False
+        precompile (bool, optional): Whether to precompile bytecode in the image. Defaults to True
 
     Returns:
         Tuple[dict, Runtime]: Tuple containing:
@@ -127,7 +287,13 @@ def deploy_agentcore(agent_name: str, entry_point: str, requirements_file: str =
         region=region,
         agent_name=agent_name
     )
-    launch_result = agentcore_runtime.launch()
+    if precompile:
+        dockerfile_path = find_dockerfile(agent_name, entry_point)
+        if dockerfile_path:
+            add_bytecode_precompilation(dockerfile_path)
+        else:
+            print("Could not find generated Dockerfile, skipping bytecode precompilation")
+    launch_result = agentcore_runtime.launch(local_build=local_build)
     
     # Add Secrets Manager access to the auto-created role
     try:
@@ -154,11 +320,18 @@ if __name__ == "__main__":
     parser.add_argument('--agent_name', type=str, help='Name of the agent to deploy')
     parser.add_argument('--entry_point', type=str, help='Entry point file for the agent')
     parser.add_argument('--local_build', action='store_true', help='Use local build (only for arm64 platforms)')
+    parser.add_argument('--profile', choices=REQUIREMENTS_PROFILES.keys(), default='runtime',
+                        help='Dependency profile to package into the image')
+    parser.add_argument('--no_precompile', action='store_true', help='Do not precompile bytecode in the image')
     args = parser.parse_args()
 
-    deploy_agentcore(
+    launch_result, _ = deploy_agentcore(
         agent_name = args.agent_name,
         entry_point = args.entry_point,
-        local_build = args.local_build
+        requirements_file = REQUIREMENTS_PROFILES[args.profile],
+        local_build = args.local_build,
+        precompile = not args.no_precompile
     )
     wait_for_status()
+    report_image_size(launch_result)
+    report_import_time(launch_result, args.entry_point)
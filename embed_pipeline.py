@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+
+"""
+A script to (re-)embed the "About Place" text of travel documents.
+
+This script keeps the `details_embedding` vectors used by the `travel_vector_index`
+in sync with the place descriptions stored in MongoDB Atlas. It:
+- Finds documents whose embedding is missing or whose "About Place" content hash changed
+- Embeds them with the same Titan model used by `mongodb_search` in agent.py
+- Runs batches concurrently with adaptive rate limiting and retries on throttling
+- Writes the new vectors back with bulk updates, one bulk write per batch
+
+Every finished batch is persisted together with the content hash it was computed from,
+so an interrupted run can simply be started again and only the remaining documents are
+embedded.
+
+Dependencies:
+- boto3
+- langchain_aws
+- pymongo
+
+Usage:
+python embed_pipeline.py [--batch_size 16] [--workers 4] [--adopt_existing]
+python embed_pipeline.py --stub --database travel_test [--mongodb_uri mongodb://localhost:27017]
+
+The stub embedder writes vectors that are meaningless to `travel_vector_index`, so it is
+refused against the production `travel` database.
+"""
+
+import argparse
+import hashlib
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from botocore.exceptions import ClientError
+from pymongo import MongoClient, UpdateOne
+
+import catalog
+from aws_clients import get_client, get_secret
+
+logger = logging.getLogger('embed_pipeline')
+
+# Must match the model used by mongodb_search in agent.py
+EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v1"
+EMBEDDING_DIMENSIONS = 1536
+
+SOURCE_FIELD = "About Place"
+EMBEDDING_FIELD = "details_embedding"
+HASH_FIELD = "details_embedding_hash"
+MODEL_FIELD = "details_embedding_model"
+
+THROTTLING_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+
+def content_hash(text: str, model_id: str = EMBEDDING_MODEL_ID) -> str:
+    """
+    Hash the text to embed together with the model id, so switching models also
+    invalidates previously stored vectors.
+    """
+    return hashlib.sha256(f"{model_id}\n{text}".encode('utf-8')).hexdigest()
+
+
+class TitanEmbedder:
+    """
+    Embeds text with Amazon Titan through Bedrock, one request per text.
+
+    The default client does not retry: throttles have to reach `embed_with_retry`, so the
+    rate limiter can back off instead of botocore's retries hiding them.
+    """
+
+    def __init__(self, client=None, model_id: str = EMBEDDING_MODEL_ID):
+        from langchain_aws.embeddings import BedrockEmbeddings
+
+        self.model_id = model_id
+        self._embeddings = BedrockEmbeddings(
+            client=client or get_client("bedrock-runtime", "us-east-1", max_attempts=1),
+            model_id=model_id,
+        )
+
+    def embed(self, text: str) -> list:
+        return self._embeddings.embed_query(text)
+
+
+class StubEmbedder:
+    """
+    Deterministic, offline stand-in for TitanEmbedder.
+
+    The same text always yields the same unit-length vector, which is enough to test the
+    pipeline end to end without AWS credentials.
+    """
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS, model_id: str = "local-stub"):
+        self.model_id = model_id
+        self.dimensions = dimensions
+
+    def embed(self, text: str) -> list:
+        rng = random.Random(hashlib.sha256(text.encode('utf-8')).digest())
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.dimensions)]
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe request pacer with additive increase / multiplicative decrease.
+
+    Every successful request nudges the allowed rate up, every throttled request halves it,
+    so the pipeline settles just below the account's Bedrock quota.
+    """
+
+    def __init__(self, initial_rate: float = 5.0, min_rate: float = 0.5, max_rate: float = 50.0,
+                 increase: float = 0.5, decrease: float = 0.5):
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            logger.warning(f"Throttled by Bedrock, lowering rate to {self.rate:.2f} req/s")
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """
+    Detect throttling from both raw botocore errors and the ValueError that
+    BedrockEmbeddings wraps them in.
+    """
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') in THROTTLING_CODES
+    message = str(error)
+    return any(code in message for code in THROTTLING_CODES) or "Too many requests" in message
+
+
+def embed_with_retry(embedder, text: str, limiter: AdaptiveRateLimiter, max_attempts: int = 6) -> list:
+    """
+    Embed a single text, backing off exponentially (with jitter) while Bedrock throttles.
+    """
+    for attempt in range(1, max_attempts + 1):
+        limiter.acquire()
+        try:
+            vector = embedder.embed(text)
+        except Exception as e:
+            if not is_throttling_error(e) or attempt == max_attempts:
+                raise
+            limiter.on_throttle()
+            backoff = min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+            logger.info(f"Retrying embedding in {backoff:.1f}s (attempt {attempt}/{max_attempts})")
+            time.sleep(backoff)
+        else:
+            limiter.on_success()
+            return vector
+
+
+def find_pending(collection, model_id: str = EMBEDDING_MODEL_ID, adopt_existing: bool = False):
+    """
+    Return the documents that need a new embedding, as (_id, text, hash) tuples.
+
+    A document is pending when its embedding is missing or empty, or when the stored hash
+    does not match its current "About Place" text. With `adopt_existing`, documents that
+    already have a vector but no hash (e.g. rows loaded by mdb_import.py from the
+    precomputed CSV) are stamped with their hash instead of being re-embedded.
+    """
+    projection = {
+        SOURCE_FIELD: 1,
+        HASH_FIELD: 1,
+        "has_embedding": {"$gt": [{"$size": {"$ifNull": [f"${EMBEDDING_FIELD}", []]}}, 0]},
+    }
+    pending = []
+    adopted = []
+    for doc in collection.find({}, projection=projection).sort("_id", 1):
+        text = doc.get(SOURCE_FIELD)
+        if not text:
+            continue
+        digest = content_hash(text, model_id)
+        if doc.get('has_embedding') and doc.get(HASH_FIELD) == digest:
+            continue
+        if adopt_existing and doc.get('has_embedding') and HASH_FIELD not in doc:
+            adopted.append(UpdateOne({"_id": doc["_id"]}, {"$set": {HASH_FIELD: digest, MODEL_FIELD: model_id}}))
+            continue
+        pending.append((doc["_id"], text, digest))
+
+    if adopted:
+        collection.bulk_write(adopted, ordered=False)
+        logger.info(f"Adopted {len(adopted)} existing embeddings")
+    return pending
+
+
+def embed_batch(collection, embedder, batch, limiter: AdaptiveRateLimiter) -> int:
+    """
+    Embed one batch and persist it with a single unordered bulk write.
+
+    The update is conditional on the text still having the hash it was embedded from, so a
+    concurrent edit is never overwritten with a stale vector.
+    """
+    updates = []
+    for _id, text, digest in batch:
+        vector = embed_with_retry(embedder, text, limiter)
+        updates.append(UpdateOne(
+            {"_id": _id, SOURCE_FIELD: text},
+            {"$set": {EMBEDDING_FIELD: vector, HASH_FIELD: digest, MODEL_FIELD: embedder.model_id}},
+        ))
+    result = collection.bulk_write(updates, ordered=False)
+    return result.modified_count
+
+
+def run_pipeline(collection, embedder, batch_size: int = 16, workers: int = 4,
+                 limiter: AdaptiveRateLimiter = None, adopt_existing: bool = False) -> int:
+    """
+    Embed every pending document of `collection` and return the number of updated documents.
+    """
+    limiter = limiter or AdaptiveRateLimiter()
+    pending = find_pending(collection, embedder.model_id, adopt_existing)
+    logger.info(f"Found {len(pending)} documents to embed")
+    if not pending:
+        return 0
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    updated = 0
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(embed_batch, collection, embedder, batch, limiter) for batch in batches]
+        for done, future in enumerate(as_completed(futures), start=1):
+            updated += future.result()
+            logger.info(f"Finished batch {done}/{len(batches)} ({updated} documents updated)")
+    except BaseException:
+        # Finished batches are already persisted, so a later run resumes from here
+        executor.shutdown(wait=True, cancel_futures=True)
+        logger.error(f"Embedding interrupted after {updated} updated documents; re-run to resume")
+        raise
+    executor.shutdown(wait=True)
+    return updated
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Embed new or changed "About Place" texts')
+    parser.add_argument('--batch_size', type=int, default=16, help='Documents per bulk update')
+    parser.add_argument('--workers', type=int, default=4, help='Batches embedded concurrently')
+    parser.add_argument('--rate', type=float, default=5.0, help='Initial Bedrock requests per second')
+    parser.add_argument('--stub', action='store_true',
+                        help='Use the deterministic local embedder (offline testing, requires a non-production --database)')
+    parser.add_argument('--adopt_existing', action='store_true',
+                        help='Keep existing vectors that have no hash yet instead of re-embedding them')
+    parser.add_argument('--database', type=str, default=catalog.DATABASE, help='Database holding the travel collections')
+    parser.add_argument('--mongodb_uri', type=str, help='Connection string to use instead of the Atlas secret')
+    args = parser.parse_args()
+
+    if args.stub and args.database == catalog.DATABASE:
+        parser.error(f"--stub would overwrite real embeddings in '{catalog.DATABASE}'; pass a test --database")
+
+    mongodb_uri = args.mongodb_uri or get_secret("workshop/atlas_secret")  # Replace with your secret name
+    client = MongoClient(mongodb_uri)
+
+    embedder = StubEmbedder() if args.stub else TitanEmbedder()
+    limiter = AdaptiveRateLimiter(initial_rate=args.rate)
+    updated = 0
+    for collection_name in catalog.COLLECTIONS:
+        logger.info(f"Embedding collection {collection_name}")
+        updated += run_pipeline(
+            client[args.database][collection_name],
+            embedder,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            limiter=limiter,
+            adopt_existing=args.adopt_existing,
+        )
+    logger.info(f"Embedding finished, {updated} documents updated")
@@ -0,0 +1,150 @@
+"""
+Deterministic fast path for simple travel questions.
+
+Questions such as "What places can I visit in India?", "What month is it?" or "Best time
+to visit Bali" map to exactly one tool call. The router recognises them with anchored
+regular expressions, calls the matching handler directly and formats the answer from a
+template, skipping the LLM tool loop entirely. Anything that does not match a rule
+completely, or whose handler finds nothing, falls through to the full agent.
+
+Per-intent hit rate, router latency and the latency saved (compared to the running
+average of full agent invocations) are available from `IntentRouter.metrics()`. Until
+the first agent invocation has been measured, INTENT_ROUTER_AGENT_SECONDS (default 5)
+stands in for the agent latency.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Entities containing these are likely compound questions, which the agent handles better
+AMBIGUOUS_ENTITY = re.compile(r",|;|\b(?:and|or|with|but|near|without|than)\b")
+
+# Weight of the latest sample in the running average of agent latency
+LATENCY_SMOOTHING = 0.2
+
+# Assumed agent latency until a real invocation has been measured
+DEFAULT_AGENT_SECONDS = float(os.getenv('INTENT_ROUTER_AGENT_SECONDS', '5'))
+
+
+@dataclass
+class Intent:
+    """
+    A simple intent: the patterns that recognise it and the handler that answers it.
+
+    The handler receives the named groups of the matching pattern as keyword arguments and
+    returns the answer, or None to fall through to the agent.
+    """
+    name: str
+    patterns: list
+    handler: object
+
+    def match(self, text: str):
+        for pattern in self.patterns:
+            match = re.fullmatch(pattern, text)
+            if match:
+                return match.groupdict()
+        return None
+
+
+def normalize(prompt: str) -> str:
+    """Lower-case the prompt, collapse whitespace and strip trailing punctuation."""
+    return re.sub(r"\s+", " ", prompt.strip().lower()).rstrip("?!. ")
+
+
+class IntentRouter:
+    """Routes prompts that match a known intent straight to their handler."""
+
+    def __init__(self, intents, agent_seconds: float = DEFAULT_AGENT_SECONDS):
+        self.intents = intents
+        self._lock = threading.Lock()
+        self._agent_latency = agent_seconds
+        self._agent_measured = False
+        self._stats = {
+            intent.name: {'hits': 0, 'fallthroughs': 0, 'router_seconds': 0.0, 'hit_seconds': 0.0}
+            for intent in intents
+        }
+        self._misses = 0
+
+    def route(self, prompt: str):
+        """
+        Answer `prompt` directly if it is a simple intent.
+
+        Returns:
+            str: The templated answer, or None if the prompt should go to the agent
+        """
+        start = time.perf_counter()
+        text = normalize(prompt)
+        for intent in self.intents:
+            entities = intent.match(text)
+            if entities is None:
+                continue
+            if any(AMBIGUOUS_ENTITY.search(value) for value in entities.values() if value):
+                break
+            try:
+                answer = intent.handler(**entities)
+            except Exception as e:
+                logger.warning(f"Router handler for '{intent.name}' failed, falling back to agent: {e}")
+                answer = None
+            self._record(intent.name, answer is not None, time.perf_counter() - start)
+            if answer is not None:
+                logger.info(f"Router answered intent '{intent.name}' without the agent")
+            return answer
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def _record(self, name: str, hit: bool, elapsed: float):
+        with self._lock:
+            stats = self._stats[name]
+            stats['router_seconds'] += elapsed
+            if hit:
+                stats['hits'] += 1
+                stats['hit_seconds'] += elapsed
+            else:
+                stats['fallthroughs'] += 1
+
+    def record_agent_latency(self, seconds: float):
+        """Feed the latency of a full agent invocation into the running average."""
+        with self._lock:
+            if not self._agent_measured:
+                self._agent_latency = seconds
+                self._agent_measured = True
+            else:
+                self._agent_latency += LATENCY_SMOOTHING * (seconds - self._agent_latency)
+
+    def metrics(self) -> dict:
+        """
+        Hit rate, average router latency and total latency saved, per intent and overall.
+
+        An intent's hit rate is its hits over the prompts that matched it (hits plus
+        fallthroughs); the overall hit rate is all hits over all routed prompts. Latency
+        saved is credited against the current average agent latency, so hits answered
+        before the first agent invocation count too.
+        """
+        with self._lock:
+            hits = sum(stats['hits'] for stats in self._stats.values())
+            total = hits + self._misses + sum(stats['fallthroughs'] for stats in self._stats.values())
+            intents = {}
+            for name, stats in self._stats.items():
+                attempts = stats['hits'] + stats['fallthroughs']
+                intents[name] = {
+                    'hits': stats['hits'],
+                    'fallthroughs': stats['fallthroughs'],
+                    'hit_rate': stats['hits'] / attempts if attempts else 0.0,
+                    'avg_router_seconds': stats['router_seconds'] / attempts if attempts else 0.0,
+                    'saved_seconds': max(0.0, stats['hits'] * self._agent_latency - stats['hit_seconds']),
+                }
+            return {
+                'requests': total,
+                'hit_rate': hits / total if total else 0.0,
+                'avg_agent_seconds': self._agent_latency,
+                'agent_seconds_measured': self._agent_measured,
+                'intents': intents,
+            }
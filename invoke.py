@@ -13,22 +13,17 @@ Requires:
 """
 
 import argparse
-import boto3
 import json
 import os
 
+from aws_clients import get_client
+
 
 region = os.getenv('AWS_REGION', 'us-west-2')
 print(f'Using region: {region}')
 
-agentcore_client = boto3.client(
-    'bedrock-agentcore',
-    region_name=region
-)
-agentcore_control_client = boto3.client(
-    'bedrock-agentcore-control',
-    region_name=region
-)
+agentcore_client = get_client('bedrock-agentcore', region)
+agentcore_control_client = get_client('bedrock-agentcore-control', region)
 
 
 def get_agent_runtimes():
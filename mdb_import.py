@@ -1,8 +1,10 @@
 import csv
 import logging
 from pymongo import MongoClient
-import boto3
-from botocore.exceptions import ClientError
+
+import best_time
+import catalog
+from aws_clients import get_secret
 
 # Configure logging
 logging.basicConfig(
@@ -11,26 +13,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger('mdb_import')
 
-def get_secret(secret_name):
-    """
-    Retrieve secret from AWS Secrets Manager
-    """
-    client = boto3.client(
-        service_name='secretsmanager'
-    )
-
-    try:
-        get_secret_value_response = client.get_secret_value(
-            SecretId=secret_name
-        )
-    except ClientError as e:
-        logger.error(f"Error retrieving secret {secret_name}: {e}")
-        raise e
-    else:
-        if 'SecretString' in get_secret_value_response:
-            logger.info(f"Successfully retrieved secret {secret_name}")
-            return get_secret_value_response['SecretString']
-
 # Get the MongoDB connection string from Secrets Manager
 logger.info("Retrieving MongoDB connection string from Secrets Manager")
 mongodb_uri = get_secret("workshop/atlas_secret")  # Replace with your secret name
@@ -39,8 +21,7 @@ mongodb_uri = get_secret("workshop/atlas_secret")  # Replace with your secret na
 logger.info("Connecting to MongoDB Atlas")
 client = MongoClient(mongodb_uri)
 
-db = client['travel']
-collection = db['asia']
+db = client[catalog.DATABASE]
 
 # CSV file path
 csv_file_path = './anthropic-travel-agency.trip_recommendations.csv'
@@ -48,6 +29,7 @@ csv_file_path = './anthropic-travel-agency.trip_recommendations.csv'
 logger.info('Starting data import from CSV to MongoDB')
 
 index = 1
+unrouted_countries = set()
 with open(csv_file_path, mode='r') as csvfile:
     reader = csv.DictReader(csvfile)
     for row in reader:
@@ -64,9 +46,19 @@ with open(csv_file_path, mode='r') as csvfile:
                 new_row[column] = row[column]
         
         new_row['details_embedding'] = detail_embedding
+        new_row[best_time.MONTHS_FIELD] = best_time.parse_best_time_months(new_row.get(best_time.SOURCE_FIELD))
 
-        collection.insert_one(new_row)
+        # Store each place in its region's collection
+        country = new_row.get('Country', '')
+        collection_name = catalog.home_collection(country)
+        if collection_name != catalog.collection_for(country) and country not in unrouted_countries:
+            unrouted_countries.add(country)
+            logger.warning(f"No enabled collection for country '{country}', storing its places in {collection_name}")
+        db[collection_name].insert_one(new_row)
         if index % 25 == 0:
             logger.info(f'Inserted {index} rows')
 
+for collection_name in catalog.COLLECTIONS:
+    best_time.ensure_month_index(db[collection_name])
+
 logger.info('Finished import successfully')
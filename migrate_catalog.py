@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+"""
+A one-off script to split the original `travel.asia` collection into regional collections.
+
+The original import stored every place in `travel.asia`. This script moves each place whose
+country belongs to another region (see catalog.REGION_COUNTRIES) into that region's
+collection. Places of unmapped countries stay where they are. For every target collection
+it also creates the best-time month index and copies the `travel_vector_index` definition
+of the source collection.
+
+Each document is written to its target before it is deleted from the source, so the script
+can be interrupted and run again.
+
+After it has finished and the vector indexes are ready, enable the regional collections for
+the agent, e.g. TRAVEL_COLLECTIONS=asia,europe,americas,africa,oceania.
+
+Usage:
+python migrate_catalog.py [--collections asia,europe,americas,africa,oceania] [--dry_run]
+"""
+
+import argparse
+import logging
+
+from pymongo import DeleteOne, MongoClient, ReplaceOne
+from pymongo.operations import SearchIndexModel
+
+import best_time
+import catalog
+from aws_clients import get_secret
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('migrate_catalog')
+
+VECTOR_INDEX_NAME = "travel_vector_index"
+
+
+def copy_vector_index(source, target):
+    """Create the source collection's vector search index on `target`, if it is missing."""
+    if list(target.list_search_indexes(VECTOR_INDEX_NAME)):
+        return
+    indexes = list(source.list_search_indexes(VECTOR_INDEX_NAME))
+    if not indexes:
+        logger.warning(f"No {VECTOR_INDEX_NAME} on {source.name}; create it on {target.name} manually")
+        return
+    definition = indexes[0].get('latestDefinition') or indexes[0].get('definition')
+    target.create_search_index(SearchIndexModel(
+        definition=definition,
+        name=VECTOR_INDEX_NAME,
+        type=indexes[0].get('type', 'vectorSearch'),
+    ))
+    logger.info(f"Created {VECTOR_INDEX_NAME} on {target.name}")
+
+
+def migrate(db, source_name: str, collections, dry_run: bool = False, batch_size: int = 100) -> dict:
+    """
+    Move the places of `db[source_name]` to their regional collections.
+
+    Args:
+        db (Database): The travel database
+        source_name (str): Collection holding all places, normally 'asia'
+        collections (list): Collections to distribute the places over
+        dry_run (bool, optional): Only count the places that would move. Defaults to False
+        batch_size (int, optional): Documents per bulk write. Defaults to 100
+
+    Returns:
+        dict: Number of moved (or, with `dry_run`, movable) places per target collection
+    """
+    source = db[source_name]
+    moved = {}
+    pending = {}
+
+    def flush(target_name):
+        docs = pending.pop(target_name, [])
+        if not docs or dry_run:
+            return
+        db[target_name].bulk_write([ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs], ordered=False)
+        source.bulk_write([DeleteOne({"_id": doc["_id"]}) for doc in docs], ordered=False)
+
+    for doc in source.find({}):
+        target_name = catalog.home_collection(doc.get('Country', ''), collections, fallback=source_name)
+        if target_name == source_name:
+            continue
+        pending.setdefault(target_name, []).append(doc)
+        moved[target_name] = moved.get(target_name, 0) + 1
+        if len(pending[target_name]) >= batch_size:
+            flush(target_name)
+    for target_name in list(pending):
+        flush(target_name)
+
+    if not dry_run:
+        for target_name in collections:
+            if target_name == source_name:
+                continue
+            best_time.ensure_month_index(db[target_name])
+            copy_vector_index(source, db[target_name])
+    return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Split travel.asia into regional collections')
+    parser.add_argument('--source', type=str, default=catalog.DEFAULT_COLLECTION, help='Collection holding all places')
+    parser.add_argument('--collections', type=str, default=','.join(catalog.REGION_COUNTRIES),
+                        help='Comma separated target collections')
+    parser.add_argument('--dry_run', action='store_true', help='Only report how many places would move')
+    args = parser.parse_args()
+
+    mongodb_uri = get_secret("workshop/atlas_secret")  # Replace with your secret name
+    client = MongoClient(mongodb_uri)
+
+    collections = [name.strip() for name in args.collections.split(',') if name.strip()]
+    moved = migrate(client[catalog.DATABASE], args.source, collections, dry_run=args.dry_run)
+    for target_name, count in sorted(moved.items()):
+        logger.info(f"{'Would move' if args.dry_run else 'Moved'} {count} places to {target_name}")
+    logger.info('Finished migration successfully')
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import admission
+from admission import AdmissionController, DeadlineExceeded, Overloaded
+
+
+def test_deadline_reaches_threads_and_is_cleared():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, request_timeout=30)
+
+    async def work():
+        return await asyncio.to_thread(admission.max_time_ms)
+
+    assert 0 < controller.run(work) <= 30000
+    assert admission.max_time_ms() is None
+    assert controller.metrics()["completed"] == 1
+
+
+def test_sheds_when_queue_is_full():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, request_timeout=5)
+    started, release = threading.Event(), threading.Event()
+
+    async def block():
+        started.set()
+        await asyncio.to_thread(release.wait)
+
+    worker = threading.Thread(target=controller.run, args=(block,))
+    worker.start()
+    started.wait()
+    with pytest.raises(Overloaded):
+        with controller.admit():
+            pass
+    release.set()
+    worker.join()
+
+    metrics = controller.metrics()
+    assert metrics["shed_queue_full"] == 1
+    assert metrics["in_flight"] == 0
+
+
+def test_times_out_at_deadline():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, request_timeout=0.05)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(DeadlineExceeded):
+        controller.run(slow)
+    assert controller.metrics()["timed_out"] == 1
+
+
+def test_timeout_does_not_wait_for_threads():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, request_timeout=0.2)
+    release = threading.Event()
+
+    async def blocked():
+        await asyncio.to_thread(release.wait, 5)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        controller.run(blocked)
+    assert time.monotonic() - start < 1
+
+    # The slot stays taken until the thread has really finished
+    assert controller.metrics()["in_flight"] == 1
+    release.set()
+    deadline = time.monotonic() + 5
+    while controller.metrics()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert controller.metrics()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("remaining, expected", [(59.9, 55), (12, 10), (4.7, 4), (0.3, 1), (300, 60)])
+def test_bedrock_read_timeout_does_not_pass_deadline(remaining, expected):
+    token = admission._deadline.set(time.monotonic() + remaining)
+    try:
+        assert admission.bedrock_read_timeout() == expected
+    finally:
+        admission._deadline.reset(token)
+
+
+def test_aggregate_options_are_empty_outside_a_request():
+    assert admission.aggregate_options() == {}
+    token = admission._deadline.set(time.monotonic() + 10)
+    try:
+        assert 0 < admission.aggregate_options()["maxTimeMS"] <= 10000
+    finally:
+        admission._deadline.reset(token)
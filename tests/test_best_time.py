@@ -0,0 +1,29 @@
+import pytest
+
+from best_time import MONTHS, parse_best_time_months
+
+WINTER_SEASON = ['January', 'February', 'March', 'October', 'November', 'December']
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("October to March", WINTER_SEASON),
+    ("Between October and March", WINTER_SEASON),
+    ("between late October and early March", WINTER_SEASON),
+    ("Late October to early March", WINTER_SEASON),
+    ("mid-October to mid-March", WINTER_SEASON),
+    ("Mid October – mid March", WINTER_SEASON),
+    ("From October through the end of March", WINTER_SEASON),
+    ("Oct-Mar", WINTER_SEASON),
+    ("November – February", ['January', 'February', 'November', 'December']),
+    ("April-June and September-November", ['April', 'May', 'June', 'September', 'October', 'November']),
+    ("March, April and October", ['March', 'April', 'October']),
+    ("Sept through Nov", ['September', 'October', 'November']),
+    ("Year-round", MONTHS),
+    ("Winter (December to February)", ['January', 'February', 'December']),
+    ("Summer", ['June', 'July', 'August']),
+    ("You may visit in May; avoid July to September", ['May']),
+    ("", []),
+    (None, []),
+])
+def test_parse_best_time_months(text, expected):
+    assert parse_best_time_months(text) == expected
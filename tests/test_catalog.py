@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+import catalog
+
+REGIONS = ["asia", "europe", "americas"]
+
+
+@pytest.mark.skipif('TRAVEL_COLLECTIONS' in os.environ, reason='collections configured by environment')
+def test_defaults_to_the_original_collection():
+    assert catalog.COLLECTIONS == ["asia"]
+    assert catalog.collections_for("France") == ["asia"]
+    assert catalog.home_collection("France") == "asia"
+
+
+def test_routes_known_countries_and_regions():
+    assert catalog.collection_for("France", REGIONS) == "europe"
+    assert catalog.collection_for(" peru ", REGIONS) == "americas"
+    assert catalog.collection_for("South America", REGIONS) == "americas"
+    assert catalog.collection_for("Atlantis", REGIONS) is None
+
+
+def test_unrouted_countries_use_an_enabled_fallback():
+    assert catalog.collection_for("Kenya", REGIONS) is None
+    assert catalog.home_collection("Kenya", REGIONS, fallback="europe") == "europe"
+    assert catalog.home_collection("Kenya", REGIONS + ["africa"], fallback="europe") == "africa"
+
+
+def test_merge_by_score():
+    results = [("asia", [{"score": 0.5}, {"score": 0.9}]), ("europe", [{"score": 0.7}])]
+    assert [doc["score"] for doc in catalog.merge_by_score(results, limit=2)] == [0.9, 0.7]
+
+
+def test_load_collections_validates_the_configuration():
+    assert catalog.load_collections({}) == (["asia"], "asia")
+    assert catalog.load_collections({"TRAVEL_COLLECTIONS": "europe, africa"}) == (["europe", "africa"], "europe")
+    assert catalog.load_collections(
+        {"TRAVEL_COLLECTIONS": "asia,europe", "TRAVEL_FALLBACK_COLLECTION": "europe"}
+    ) == (["asia", "europe"], "europe")
+    with pytest.raises(ValueError, match="at least one collection"):
+        catalog.load_collections({"TRAVEL_COLLECTIONS": " , "})
+    with pytest.raises(ValueError, match="not one of TRAVEL_COLLECTIONS"):
+        catalog.load_collections({"TRAVEL_COLLECTIONS": "asia", "TRAVEL_FALLBACK_COLLECTION": "europe"})
@@ -0,0 +1,49 @@
+import context_builder
+from context_builder import build_context, deduplicate, estimate_tokens, mmr_rerank
+
+QUERY = [1.0, 0.0, 0.0]
+
+
+def hit(name, vector, score, text="A quiet place."):
+    return {"Place Name": name, "Country": "X", "details_embedding": vector, "score": score, "About Place": text}
+
+
+def test_near_duplicate_embeddings_are_dropped():
+    hits = [
+        hit("A", [1.0, 0.0, 0.0], 0.9),
+        hit("B", [0.999, 0.01, 0.0], 0.89),
+        hit("a", [0.0, 1.0, 0.0], 0.5),
+        hit("C", [0.0, 1.0, 0.0], 0.4),
+    ]
+
+    kept = deduplicate(hits, "details_embedding", "Place Name")
+    assert [h["Place Name"] for h in kept] == ["A", "C"]
+
+
+def test_mmr_prefers_a_diverse_hit_over_a_redundant_one():
+    hits = [
+        hit("A", [0.9, 0.436, 0.0], 0.9),
+        hit("Redundant", [0.85, 0.527, 0.0], 0.85),
+        hit("Diverse", [0.8, 0.0, 0.6], 0.8),
+    ]
+
+    selected = mmr_rerank(QUERY, hits, "details_embedding", k=2, mmr_lambda=0.5)
+    assert [h["Place Name"] for h in selected] == ["A", "Diverse"]
+
+
+def test_context_stays_within_budget():
+    text = " ".join(f"Sentence {i} describes the beaches and temples." for i in range(20))
+    hits = [hit(name, [1.0, i, 0.0], 0.9 - i / 10, text) for i, name in enumerate("ABCDE")]
+
+    context = build_context("beaches", QUERY, hits, "About Place", "details_embedding", token_budget=60)
+    assert context
+    assert estimate_tokens(context) <= 60
+
+
+def test_small_budget_keeps_one_sentence_of_the_best_hit(monkeypatch):
+    monkeypatch.setattr(context_builder, "SENTENCES_PER_HIT", 3)
+    text = "Temples line the old town. " * 10 + "The beaches are quiet in winter."
+    hits = [hit("A", [1.0, 0.0, 0.0], 0.9, text), hit("B", [0.0, 1.0, 0.0], 0.8, text)]
+
+    context = build_context("quiet beaches", QUERY, hits, "About Place", "details_embedding", token_budget=5)
+    assert context == "A, X (score 0.900): The beaches are quiet in winter."
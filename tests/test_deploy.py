@@ -0,0 +1,80 @@
+import os
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("bedrock_agentcore_starter_toolkit")
+
+import deploy  # noqa: E402
+
+TOOLKIT_DOCKERFILE = """FROM ghcr.io/astral-sh/uv:python3.11-bookworm-slim
+WORKDIR /app
+COPY requirements-runtime.txt requirements-runtime.txt
+RUN uv pip install -r requirements-runtime.txt
+RUN useradd -m -u 1000 bedrock_agentcore
+USER bedrock_agentcore
+EXPOSE 8080
+COPY . .
+CMD ["opentelemetry-instrument", "python", "-m", "agent"]
+"""
+
+
+def test_precompile_runs_as_root_after_copy(tmp_path):
+    dockerfile = tmp_path / "Dockerfile"
+    dockerfile.write_text(TOOLKIT_DOCKERFILE)
+
+    deploy.add_bytecode_precompilation(str(dockerfile))
+    deploy.add_bytecode_precompilation(str(dockerfile))
+
+    lines = [line for line in dockerfile.read_text().splitlines() if line]
+    compile_at = next(i for i, line in enumerate(lines) if "compileall" in line)
+    assert lines.index("COPY . .") < compile_at
+    assert lines[compile_at - 2:compile_at] == ["USER root", deploy.PRECOMPILE_MARKER]
+    assert lines[compile_at + 1] == "USER bedrock_agentcore"
+    assert lines[-1].startswith("CMD")
+    assert sum("compileall" in line for line in lines) == 1
+
+
+def test_precompile_without_user_switch(tmp_path):
+    dockerfile = tmp_path / "Dockerfile"
+    dockerfile.write_text("FROM python:3.11\nWORKDIR /app\nCOPY . .\nCMD [\"python\", \"-m\", \"agent\"]")
+
+    deploy.add_bytecode_precompilation(str(dockerfile))
+
+    text = dockerfile.read_text()
+    assert "USER" not in text
+    assert text.index("compileall") < text.index("CMD")
+
+
+def test_full_profile_is_standalone():
+    for requirements_file in deploy.REQUIREMENTS_PROFILES.values():
+        with open(os.path.join(os.path.dirname(deploy.__file__), requirements_file)) as f:
+            assert not any(line.strip().startswith("-r") for line in f)
+
+
+def test_import_time_is_measured_in_the_local_image(monkeypatch):
+    calls = []
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   json\n"
+        "import time:      3000 |    1250000 | agent\n"
+    )
+
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout="", stderr=stderr)
+
+    monkeypatch.setattr(deploy.subprocess, "run", run)
+    launch_result = SimpleNamespace(mode="cloud", tag="bedrock_agentcore-travel:20260101")
+
+    assert deploy.report_import_time(launch_result, "agent.py") == 1.25
+    assert calls[0][:5] == ["docker", "run", "--rm", "--entrypoint", "python"]
+    assert "bedrock_agentcore-travel:20260101" in calls[0]
+
+
+def test_import_time_is_not_measured_for_codebuild(monkeypatch):
+    monkeypatch.setattr(deploy.subprocess, "run", pytest.fail)
+    launch_result = SimpleNamespace(mode="codebuild", tag="bedrock_agentcore-travel:20260101")
+
+    assert deploy.report_import_time(launch_result, "agent.py") is None
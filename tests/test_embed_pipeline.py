@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+
+import pytest
+
+import embed_pipeline
+from embed_pipeline import (
+    EMBEDDING_FIELD,
+    HASH_FIELD,
+    MODEL_FIELD,
+    SOURCE_FIELD,
+    AdaptiveRateLimiter,
+    StubEmbedder,
+    run_pipeline,
+)
+
+
+class FakeCursor(list):
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self, key=lambda doc: doc[key], reverse=direction < 0))
+
+
+class FakeCollection:
+    """In-memory stand-in for the pymongo calls made by embed_pipeline."""
+
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+
+    def find(self, filter, projection):
+        results = []
+        for doc in self.docs.values():
+            projected = {"_id": doc["_id"]}
+            for field in (SOURCE_FIELD, HASH_FIELD):
+                if field in doc:
+                    projected[field] = doc[field]
+            projected["has_embedding"] = bool(doc.get(EMBEDDING_FIELD))
+            results.append(projected)
+        return FakeCursor(results)
+
+    def bulk_write(self, requests, ordered=True):
+        modified = 0
+        for request in requests:
+            doc = self.docs.get(request._filter["_id"])
+            if doc is None or any(doc.get(k) != v for k, v in request._filter.items()):
+                continue
+            doc.update(request._doc["$set"])
+            modified += 1
+        return SimpleNamespace(modified_count=modified)
+
+
+class CountingEmbedder(StubEmbedder):
+    def __init__(self, fail_after=None):
+        super().__init__(dimensions=8)
+        self.calls = []
+        self.fail_after = fail_after
+
+    def embed(self, text):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise RuntimeError("interrupted")
+        self.calls.append(text)
+        return super().embed(text)
+
+
+def make_collection(count):
+    return FakeCollection({"_id": i, SOURCE_FIELD: f"Place {i} is lovely."} for i in range(count))
+
+
+def fast_limiter():
+    return AdaptiveRateLimiter(initial_rate=1000.0, max_rate=1000.0)
+
+
+def test_stub_embedder_is_deterministic():
+    embedder = StubEmbedder(dimensions=16)
+    assert embedder.embed("Goa") == embedder.embed("Goa")
+    assert embedder.embed("Goa") != embedder.embed("Bali")
+    assert sum(v * v for v in embedder.embed("Goa")) == pytest.approx(1.0)
+
+
+def test_unchanged_documents_are_skipped():
+    collection = make_collection(5)
+    embedder = CountingEmbedder()
+
+    assert run_pipeline(collection, embedder, batch_size=2, workers=2, limiter=fast_limiter()) == 5
+    assert all(doc[MODEL_FIELD] == embedder.model_id for doc in collection.docs.values())
+
+    collection.docs[3][SOURCE_FIELD] = "Place 3 has a new description."
+    embedder.calls.clear()
+    assert run_pipeline(collection, embedder, batch_size=2, workers=2, limiter=fast_limiter()) == 1
+    assert embedder.calls == ["Place 3 has a new description."]
+
+
+def test_rerun_resumes_after_interruption():
+    collection = make_collection(6)
+
+    with pytest.raises(RuntimeError):
+        run_pipeline(collection, CountingEmbedder(fail_after=4), batch_size=2, workers=1, limiter=fast_limiter())
+    done = [_id for _id, doc in collection.docs.items() if doc.get(EMBEDDING_FIELD)]
+    assert done == [0, 1, 2, 3]
+
+    embedder = CountingEmbedder()
+    assert run_pipeline(collection, embedder, batch_size=2, workers=1, limiter=fast_limiter()) == 2
+    assert embedder.calls == ["Place 4 is lovely.", "Place 5 is lovely."]
+
+
+def test_adopt_existing_keeps_vectors():
+    collection = FakeCollection([{"_id": 1, SOURCE_FIELD: "Kyoto temples.", EMBEDDING_FIELD: [0.1, 0.2]}])
+    embedder = CountingEmbedder()
+
+    assert run_pipeline(collection, embedder, adopt_existing=True, limiter=fast_limiter()) == 0
+    assert embedder.calls == []
+    assert collection.docs[1][EMBEDDING_FIELD] == [0.1, 0.2]
+    assert collection.docs[1][HASH_FIELD] == embed_pipeline.content_hash("Kyoto temples.", embedder.model_id)
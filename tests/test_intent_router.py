@@ -0,0 +1,41 @@
+import pytest
+
+from intent_router import Intent, IntentRouter
+
+
+def make_router():
+    return IntentRouter([
+        Intent(
+            name="places",
+            patterns=[r"what places can i visit in (?P<country>[a-z ]+)"],
+            handler=lambda country: None if country == "atlantis" else f"Places in {country}",
+        ),
+    ], agent_seconds=4.0)
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("What places can I visit in India?", "Places in india"),
+    ("what places can i visit in india and nepal", None),
+    ("What places can I visit in Atlantis?", None),
+    ("Find me a quiet beach", None),
+])
+def test_route(prompt, expected):
+    assert make_router().route(prompt) == expected
+
+
+def test_metrics_before_any_agent_call():
+    router = make_router()
+    router.route("What places can I visit in India?")
+    router.route("What places can I visit in Atlantis?")
+    router.route("Find me a quiet beach")
+
+    metrics = router.metrics()
+    places = metrics["intents"]["places"]
+    assert metrics["requests"] == 3
+    assert metrics["hit_rate"] == pytest.approx(1 / 3)
+    assert places["hit_rate"] == pytest.approx(0.5)
+    assert 3.9 < places["saved_seconds"] <= 4.0
+    assert not metrics["agent_seconds_measured"]
+
+    router.record_agent_latency(10.0)
+    assert 9.9 < router.metrics()["intents"]["places"]["saved_seconds"] <= 10.0